@@ -5,169 +5,465 @@ from openpyxl import load_workbook
 from openpyxl.drawing.image import Image as ExcelImage
 import re
 import io
+import html
+import posixpath
+import zipfile
+import xml.etree.ElementTree as ET
+from xml.sax.saxutils import escape
 import requests
-from typing import List, Tuple, Dict
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import List, Tuple, Dict, Optional
 from PIL import Image
-import tempfile
-import os
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter, defaultdict
+from urllib.parse import urlparse
+import threading
 
-def download_image(url: str) -> Tuple[bool, str, str]:
+# Maximum number of worker threads used to download images
+MAX_WORKERS = 16
+
+# Maximum number of downloads allowed in flight to the same host
+BATCH_SIZE = 8
+
+# Shared HTTP session so connections are pooled and reused across threads
+SESSION = requests.Session()
+SESSION.headers.update({
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+})
+_adapter = HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=32,
+    max_retries=Retry(total=2, backoff_factor=0.3)
+)
+SESSION.mount('https://', _adapter)
+SESSION.mount('http://', _adapter)
+
+# Maximum number of individual changes kept for display; the summary still counts all of them
+MAX_DISPLAYED_CHANGES = 500
+
+# Largest image body accepted before a download is aborted
+MAX_IMAGE_BYTES = 10 * 1024 * 1024
+
+# Size of the chunks read from the network
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# Pattern to match =@IMAGE("link") or =@IMAGE('link')
+_IMAGE_RE = re.compile(r'=@IMAGE\s*\(\s*["\']([^"\']+)["\']\s*\)', re.IGNORECASE)
+
+# Cells, formulas and cell references inside worksheet XML, allowing for namespace prefixes
+_XML_CELL_RE = re.compile(rb'<((?:\w+:)?c)\b([^>]*?)(?:/>|>(.*?)</\1>)', re.DOTALL)
+_XML_FORMULA_RE = re.compile(rb'<((?:\w+:)?f)\b([^>]*)(?<!/)>(.*?)</\1>', re.DOTALL)
+_XML_VALUE_RE = re.compile(rb'<((?:\w+:)?v)\b[^>]*?(?:/>|>.*?</\1>)', re.DOTALL)
+_XML_REF_RE = re.compile(rb'\br="([A-Za-z]+[0-9]+)"')
+_XML_TYPE_RE = re.compile(rb'\bt="')
+_XML_TYPE_ATTR_RE = re.compile(rb'\s+t="[^"]*"')
+
+# Workbook calculation settings
+_XML_CALC_PR_RE = re.compile(rb'<((?:\w+:)?calcPr)\b([^>]*?)(/?>)')
+_XML_FULL_CALC_RE = re.compile(rb'\bfullCalcOnLoad="')
+
+_RELATIONSHIP_ID = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id'
+
+# One semaphore per host so a single server never sees more than BATCH_SIZE requests at once
+_host_slots: Dict[str, threading.BoundedSemaphore] = defaultdict(lambda: threading.BoundedSemaphore(BATCH_SIZE))
+_host_slots_lock = threading.Lock()
+
+def _has_image_token(value) -> bool:
+    """
+    Cheap check that rules out values which cannot contain an @IMAGE function.
+    """
+    # "=@" has no letters, so a plain find matches regardless of case without copying the string
+    return isinstance(value, str) and value.find('=@') >= 0
+
+def _host_slot(url: str) -> threading.BoundedSemaphore:
     """
-    Download image from URL and return success status, file path, and error message.
+    Return the semaphore limiting concurrent downloads from the host of the URL.
+    """
+    with _host_slots_lock:
+        return _host_slots[urlparse(url).netloc.lower()]
+
+@st.cache_data(ttl=3600, max_entries=1024, show_spinner=False)
+def fetch_image_bytes(url: str, max_image_size: int = 200) -> bytes:
+    """
+    Download image from URL, shrink it to fit max_image_size, and return it as PNG or JPEG bytes.
+    Results are shared across sessions; failures raise and are therefore not cached.
+    """
+    # Stream the body into memory, aborting once it grows past the size limit
+    buffer = io.BytesIO()
+    with _host_slot(url), SESSION.get(url, stream=True, timeout=10) as response:
+        response.raise_for_status()
+        total = 0
+        for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+            total += len(chunk)
+            if total > MAX_IMAGE_BYTES:
+                raise ValueError(f"Image larger than {MAX_IMAGE_BYTES // (1024 * 1024)} MB")
+            buffer.write(chunk)
+    buffer.seek(0)
+    
+    # Verify it's a valid image
+    try:
+        with Image.open(buffer) as img:
+            # Images that are already small enough and embeddable as-is skip the re-encode,
+            # but are still decoded so truncated or corrupt files are rejected
+            if img.format in ('PNG', 'JPEG') and img.mode in ('RGB', 'L') and max(img.size) <= max_image_size:
+                img.load()
+                return buffer.getvalue()
+            
+            # Convert to RGB if necessary
+            if img.mode in ('RGBA', 'P'):
+                img = img.convert('RGB')
+            
+            # Downscale before encoding so the workbook stores the small image; for JPEGs thumbnail
+            # first drafts the decoder, so libjpeg decodes at a reduced scale instead of full resolution
+            img.thumbnail((max_image_size, max_image_size), Image.LANCZOS)
+            
+            # Store thumbnails as 8-bit palette PNGs: 1 byte per pixel instead of 3 for RGB
+            if img.mode == 'RGB':
+                img = img.quantize(colors=256)
+            
+            output = io.BytesIO()
+            img.save(output, 'PNG', optimize=True)
+    except Exception as img_error:
+        raise ValueError(f"Invalid image format: {str(img_error)}")
+    
+    return output.getvalue()
+
+def _record_change(changes: List[Dict], sheet_stats: Dict[str, Counter], change: Dict) -> None:
+    """
+    Count a change in the per-sheet summary and keep its details while under the display limit.
+    """
+    status = 'Success' if change['status'] == 'Success' else 'Error'
+    sheet_stats[change['sheet']][status] += 1
+    if len(changes) < MAX_DISPLAYED_CHANGES:
+        changes.append(change)
+
+def download_image(url: str, max_image_size: int = 200) -> Tuple[bool, bytes, str]:
+    """
+    Download image from URL, shrink it to fit max_image_size, and return success status, image bytes, and error message.
     """
     try:
         # Clean up the URL
         url = url.strip()
         
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
+        return True, fetch_image_bytes(url, max_image_size), ""
+            
+    except requests.exceptions.RequestException as e:
+        return False, b"", f"Download failed: {str(e)}"
+    except ValueError as e:
+        return False, b"", str(e)
+    except Exception as e:
+        return False, b"", f"Unexpected error: {str(e)}"
+
+def download_images(urls: List[str], max_image_size: int = 200) -> List[Tuple[bool, bytes, str]]:
+    """
+    Download, decode and resize several images concurrently, returning results in the same order as the URLs.
+    """
+    if not urls:
+        return []
+    
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(urls))) as executor:
+        return list(executor.map(download_image, urls, [max_image_size] * len(urls)))
+
+def _workbook_parts(archive: zipfile.ZipFile) -> Tuple[List[Tuple[str, str]], List[str]]:
+    """
+    Resolve the workbook relationships of an .xlsx archive.
+    Returns (sheet name, archive member) pairs for the worksheets in workbook order, and the shared strings members.
+    """
+    workbook_xml = ET.fromstring(archive.read('xl/workbook.xml'))
+    rels_xml = ET.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+    
+    # Parts are identified by relationship type, as openpyxl does, not by where they are stored
+    worksheet_targets = {}
+    shared_strings_parts = []
+    for rel in rels_xml.iterfind('{*}Relationship'):
+        target = rel.get('Target', '')
+        if target.startswith('/'):
+            part = target.lstrip('/')
+        else:
+            part = posixpath.normpath(posixpath.join('xl', target))
+        
+        rel_type = rel.get('Type', '')
+        if rel_type.endswith('/worksheet'):
+            worksheet_targets[rel.get('Id')] = part
+        elif rel_type.endswith('/sharedStrings'):
+            shared_strings_parts.append(part)
+    
+    worksheet_parts = []
+    for sheet in workbook_xml.iterfind('{*}sheets/{*}sheet'):
+        part = worksheet_targets.get(sheet.get(_RELATIONSHIP_ID))
+        if part is not None:
+            worksheet_parts.append((sheet.get('name'), part))
+    return worksheet_parts, shared_strings_parts
+
+def _rewrite_sheet_xml(data: bytes, sheet_name: str, changes: List[Dict], sheet_stats: Dict[str, Counter]) -> Optional[bytes]:
+    """
+    Replace @IMAGE formulas in one worksheet's XML, or return None if the sheet needs openpyxl.
+    """
+    if b'@' not in data:
+        return data
+    
+    pieces = []
+    last = 0
+    for cell_match in _XML_CELL_RE.finditer(data):
+        body = cell_match.group(3)
+        if not body:
+            continue
         
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
+        formula_match = _XML_FORMULA_RE.search(body)
+        rest = body if formula_match is None else body[:formula_match.start()] + body[formula_match.end():]
+        if b'=@' in rest:
+            # openpyxl turns text starting with "=" into a formula, which a text rewrite can't reproduce
+            return None
+        if formula_match is None:
+            continue
         
-        # Create temporary file
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.png')
-        temp_file.write(response.content)
-        temp_file.close()
+        original_value = '=' + html.unescape(formula_match.group(3).decode('utf-8'))
+        if not _has_image_token(original_value):
+            continue
+        match = _IMAGE_RE.search(original_value)
+        if not match:
+            continue
         
-        # Verify it's a valid image
-        try:
-            with Image.open(temp_file.name) as img:
-                # Convert to RGB if necessary and save as PNG
-                if img.mode in ('RGBA', 'P'):
-                    img = img.convert('RGB')
-                img.save(temp_file.name, 'PNG')
+        ref_match = _XML_REF_RE.search(cell_match.group(2))
+        if ref_match is None or _XML_TYPE_RE.search(formula_match.group(2)):
+            # Cells without a reference and shared or array formulas are left to openpyxl
+            return None
+        
+        # Rebuild the cell like openpyxl would: new formula, no cached value and no cached value type
+        new_value = _IMAGE_RE.sub(r'=IMAGE("\1")', original_value)
+        new_body = (
+            body[:formula_match.start(3)]
+            + escape(new_value[1:]).encode('utf-8')
+            + body[formula_match.end(3):]
+        )
+        tag = cell_match.group(1)
+        pieces.append(data[last:cell_match.start()])
+        pieces.append(
+            b'<' + tag + _XML_TYPE_ATTR_RE.sub(b'', cell_match.group(2)) + b'>'
+            + _XML_VALUE_RE.sub(b'', new_body)
+            + b'</' + tag + b'>'
+        )
+        last = cell_match.end()
+        
+        _record_change(changes, sheet_stats, {
+            'sheet': sheet_name,
+            'cell': ref_match.group(1).decode('ascii'),
+            'original': original_value,
+            'action': 'Formula replaced',
+            'url': match.group(1),
+            'status': 'Success'
+        })
+    
+    pieces.append(data[last:])
+    return b''.join(pieces)
+
+def _enable_full_calc_on_load(data: bytes) -> bytes:
+    """
+    Default fullCalcOnLoad on the workbook's calcPr, as openpyxl does, so Excel recalculates the rewritten formulas.
+    """
+    calc_match = _XML_CALC_PR_RE.search(data)
+    
+    # Like openpyxl, keep an explicit setting and leave workbooks without calcPr alone
+    if calc_match is None or _XML_FULL_CALC_RE.search(calc_match.group(2)):
+        return data
+    
+    attributes = calc_match.group(2).rstrip() + b' fullCalcOnLoad="1"'
+    return (
+        data[:calc_match.start()]
+        + b'<' + calc_match.group(1) + attributes + calc_match.group(3)
+        + data[calc_match.end():]
+    )
+
+def _replace_formulas_in_archive(file_content: bytes) -> Optional[Tuple[bytes, List[Dict], Dict[str, Counter]]]:
+    """
+    Replace @IMAGE formulas by rewriting the worksheet XML inside the .xlsx archive directly.
+    Returns None when the workbook has to go through openpyxl instead.
+    """
+    changes = []
+    sheet_stats = defaultdict(Counter)
+    try:
+        with zipfile.ZipFile(io.BytesIO(file_content)) as archive:
+            worksheet_parts, shared_strings_parts = _workbook_parts(archive)
             
-            return True, temp_file.name, ""
-        except Exception as img_error:
-            os.unlink(temp_file.name)
-            return False, "", f"Invalid image format: {str(img_error)}"
+            # Text cells holding =@IMAGE(...) live in the shared strings table; a missing part raises KeyError
+            for part in shared_strings_parts:
+                if b'=@' in archive.read(part):
+                    return None
             
-    except requests.exceptions.RequestException as e:
-        return False, "", f"Download failed: {str(e)}"
-    except Exception as e:
-        return False, "", f"Unexpected error: {str(e)}"
+            rewritten = {}
+            for sheet_name, part in worksheet_parts:
+                data = _rewrite_sheet_xml(archive.read(part), sheet_name, changes, sheet_stats)
+                if data is None:
+                    return None
+                rewritten[part] = data
+            
+            if not sheet_stats:
+                return file_content, [], {}
+            
+            rewritten['xl/workbook.xml'] = _enable_full_calc_on_load(archive.read('xl/workbook.xml'))
+            
+            output_buffer = io.BytesIO()
+            with zipfile.ZipFile(output_buffer, 'w', zipfile.ZIP_DEFLATED) as output_archive:
+                for item in archive.infolist():
+                    if item.filename in rewritten:
+                        output_archive.writestr(item, rewritten[item.filename])
+                    else:
+                        output_archive.writestr(item, archive.read(item))
+    except (zipfile.BadZipFile, KeyError, ET.ParseError, UnicodeDecodeError):
+        return None
+    
+    return output_buffer.getvalue(), changes, dict(sheet_stats)
 
-def process_excel_with_images(file_content: bytes, insert_images: bool = True, max_image_size: int = 200) -> Tuple[bytes, List[Dict]]:
+def process_excel_with_images(file_content: bytes, insert_images: bool = True, max_image_size: int = 200) -> Tuple[bytes, List[Dict], Dict[str, Counter]]:
     """
     Process Excel file to either replace @IMAGE functions or insert actual images.
+    Returns the new file, the first MAX_DISPLAYED_CHANGES changes, and per-sheet Success/Error counts.
     """
+    # Formula replacement is a pure text substitution, so try it without parsing the workbook
+    if not insert_images:
+        result = _replace_formulas_in_archive(file_content)
+        if result is not None:
+            return result
+    
     workbook = load_workbook(io.BytesIO(file_content))
     changes = []
-    temp_files = []
-    
-    # Pattern to match =@IMAGE("link") or =@IMAGE('link')
-    pattern = r'=@IMAGE\s*\(\s*["\']([^"\']+)["\']\s*\)'
+    sheet_stats = defaultdict(Counter)
     
-    try:
-        # Process each worksheet
-        for sheet_name in workbook.sheetnames:
-            worksheet = workbook[sheet_name]
-            
-            # Iterate through all cells
-            for row in worksheet.iter_rows():
-                for cell in row:
-                    if cell.value and isinstance(cell.value, str):
-                        # Check if cell contains @IMAGE function
-                        match = re.search(pattern, cell.value, flags=re.IGNORECASE)
-                        if match:
-                            url = match.group(1)
-                            original_value = cell.value
-                            
-                            if insert_images:
-                                # Try to download and insert the image
-                                success, temp_path, error_msg = download_image(url)
-                                
-                                if success:
-                                    try:
-                                        # Create Excel image object
-                                        excel_img = ExcelImage(temp_path)
-                                        
-                                        # Resize image to fit in cell
-                                        excel_img.width = min(excel_img.width, max_image_size)
-                                        excel_img.height = min(excel_img.height, max_image_size)
-                                        
-                                        # Clear the cell content
-                                        cell.value = ""
-                                        
-                                        # Add image to worksheet anchored to the cell
-                                        excel_img.anchor = f"{cell.column_letter}{cell.row}"
-                                        worksheet.add_image(excel_img)
-                                        
-                                        # Adjust row height and column width to accommodate image
-                                        worksheet.row_dimensions[cell.row].height = max(
-                                            worksheet.row_dimensions[cell.row].height or 15,
-                                            excel_img.height * 0.75  # Excel uses points, images use pixels
-                                        )
-                                        worksheet.column_dimensions[cell.column_letter].width = max(
-                                            worksheet.column_dimensions[cell.column_letter].width or 8,
-                                            excel_img.width * 0.15  # Rough conversion
-                                        )
-                                        
-                                        changes.append({
-                                            'sheet': sheet_name,
-                                            'cell': f"{cell.column_letter}{cell.row}",
-                                            'original': original_value,
-                                            'action': 'Image inserted',
-                                            'url': url,
-                                            'status': 'Success'
-                                        })
-                                        
-                                        temp_files.append(temp_path)
-                                        
-                                    except Exception as e:
-                                        # If image insertion fails, fall back to formula replacement
-                                        cell.value = re.sub(pattern, r'=IMAGE("\1")', original_value, flags=re.IGNORECASE)
-                                        changes.append({
-                                            'sheet': sheet_name,
-                                            'cell': f"{cell.column_letter}{cell.row}",
-                                            'original': original_value,
-                                            'action': 'Formula replaced (image insertion failed)',
-                                            'url': url,
-                                            'status': f'Error: {str(e)}'
-                                        })
-                                        if temp_path:
-                                            temp_files.append(temp_path)
-                                else:
-                                    # If download fails, replace with regular IMAGE formula
-                                    cell.value = re.sub(pattern, r'=IMAGE("\1")', original_value, flags=re.IGNORECASE)
-                                    changes.append({
-                                        'sheet': sheet_name,
-                                        'cell': f"{cell.column_letter}{cell.row}",
-                                        'original': original_value,
-                                        'action': 'Formula replaced (download failed)',
-                                        'url': url,
-                                        'status': f'Error: {error_msg}'
-                                    })
-                            else:
-                                # Just replace the formula
-                                new_value = re.sub(pattern, r'=IMAGE("\1")', original_value, flags=re.IGNORECASE)
-                                cell.value = new_value
-                                changes.append({
-                                    'sheet': sheet_name,
-                                    'cell': f"{cell.column_letter}{cell.row}",
-                                    'original': original_value,
-                                    'action': 'Formula replaced',
-                                    'url': url,
-                                    'status': 'Success'
-                                })
+    # Scan every worksheet for cells containing @IMAGE functions
+    tasks = []
+    for sheet_name in workbook.sheetnames:
+        worksheet = workbook[sheet_name]
         
-        # Save modified workbook to bytes
-        output_buffer = io.BytesIO()
-        workbook.save(output_buffer)
-        output_buffer.seek(0)
+        # Iterate through populated cells only; openpyxl keeps them in _cells keyed by (row, column)
+        for cell in worksheet._cells.values():
+            value = cell.value
+            if _has_image_token(value):
+                # Check if cell contains @IMAGE function
+                match = _IMAGE_RE.search(value)
+                if match:
+                    tasks.append((sheet_name, cell, match.group(1), value))
+    
+    # Download and prepare each unique URL once in worker threads; openpyxl is only touched below on this thread
+    if insert_images:
+        unique_urls = list(dict.fromkeys(task[2].strip() for task in tasks))
+        downloads = dict(zip(unique_urls, download_images(unique_urls, max_image_size)))
+        results = [downloads[task[2].strip()] for task in tasks]
+    else:
+        results = [None] * len(tasks)
+    
+    # Apply the results to the workbook
+    for (sheet_name, cell, url, original_value), result in zip(tasks, results):
+        worksheet = workbook[sheet_name]
+        column_letter = cell.column_letter
+        row = cell.row
+        anchor = f"{column_letter}{row}"
         
-        return output_buffer.getvalue(), changes
+        if insert_images:
+            success, image_bytes, error_msg = result
+            
+            if success:
+                try:
+                    # Create Excel image object
+                    excel_img = ExcelImage(io.BytesIO(image_bytes))
+                    
+                    # Clear the cell content
+                    cell.value = ""
+                    
+                    # Add image to worksheet anchored to the cell
+                    excel_img.anchor = anchor
+                    worksheet.add_image(excel_img)
+                    
+                    # Adjust row height and column width to accommodate image
+                    row_dimension = worksheet.row_dimensions[row]
+                    column_dimension = worksheet.column_dimensions[column_letter]
+                    row_dimension.height = max(
+                        row_dimension.height or 15,
+                        excel_img.height * 0.75  # Excel uses points, images use pixels
+                    )
+                    column_dimension.width = max(
+                        column_dimension.width or 8,
+                        excel_img.width * 0.15  # Rough conversion
+                    )
+                    
+                    _record_change(changes, sheet_stats, {
+                        'sheet': sheet_name,
+                        'cell': anchor,
+                        'original': original_value,
+                        'action': 'Image inserted',
+                        'url': url,
+                        'status': 'Success'
+                    })
+                    
+                except Exception as e:
+                    # If image insertion fails, fall back to formula replacement
+                    cell.value = _IMAGE_RE.sub(r'=IMAGE("\1")', original_value)
+                    _record_change(changes, sheet_stats, {
+                        'sheet': sheet_name,
+                        'cell': anchor,
+                        'original': original_value,
+                        'action': 'Formula replaced (image insertion failed)',
+                        'url': url,
+                        'status': f'Error: {str(e)}'
+                    })
+            else:
+                # If download fails, replace with regular IMAGE formula
+                cell.value = _IMAGE_RE.sub(r'=IMAGE("\1")', original_value)
+                _record_change(changes, sheet_stats, {
+                    'sheet': sheet_name,
+                    'cell': anchor,
+                    'original': original_value,
+                    'action': 'Formula replaced (download failed)',
+                    'url': url,
+                    'status': f'Error: {error_msg}'
+                })
+        else:
+            # Just replace the formula
+            new_value = _IMAGE_RE.sub(r'=IMAGE("\1")', original_value)
+            cell.value = new_value
+            _record_change(changes, sheet_stats, {
+                'sheet': sheet_name,
+                'cell': anchor,
+                'original': original_value,
+                'action': 'Formula replaced',
+                'url': url,
+                'status': 'Success'
+            })
     
-    finally:
-        # Clean up temporary files
-        for temp_file in temp_files:
-            try:
-                if os.path.exists(temp_file):
-                    os.unlink(temp_file)
-            except:
-                pass
+    # Save modified workbook to bytes
+    output_buffer = io.BytesIO()
+    workbook.save(output_buffer)
+    output_buffer.seek(0)
+    
+    return output_buffer.getvalue(), changes, dict(sheet_stats)
+
+class _ResultHasErrors(Exception):
+    """
+    Carries a processing result out of the cached function so results with errors are not cached.
+    """
+    def __init__(self, result: Tuple[bytes, List[Dict], Dict[str, Counter]]):
+        super().__init__("Processing result contains errors")
+        self.result = result
+
+@st.cache_data(ttl=3600, show_spinner=False, max_entries=8)
+def _process_excel_with_images_cached(file_content: bytes, insert_images: bool, max_image_size: int) -> Tuple[bytes, List[Dict], Dict[str, Counter]]:
+    """
+    Run process_excel_with_images, raising instead of returning when any change failed.
+    """
+    result = process_excel_with_images(file_content, insert_images, max_image_size)
+    if any(stats['Error'] for stats in result[2].values()):
+        raise _ResultHasErrors(result)
+    return result
+
+def process_excel_with_images_cached(file_content: bytes, insert_images: bool = True, max_image_size: int = 200) -> Tuple[bytes, List[Dict], Dict[str, Counter]]:
+    """
+    Cached wrapper around process_excel_with_images keyed on the file bytes and settings.
+    Results with download or insertion errors are returned but not cached, so re-running retries them.
+    """
+    try:
+        return _process_excel_with_images_cached(file_content, insert_images, max_image_size)
+    except _ResultHasErrors as e:
+        return e.result
 
 def main():
     st.set_page_config(
@@ -229,7 +525,7 @@ def main():
             with st.spinner(progress_text):
                 if insert_images:
                     progress_bar.progress(50)
-                modified_content, changes = process_excel_with_images(file_content, insert_images, max_image_size)
+                modified_content, changes, sheet_stats = process_excel_with_images_cached(file_content, insert_images, max_image_size)
                 if insert_images:
                     progress_bar.progress(100)
                     progress_bar.empty()
@@ -240,8 +536,9 @@ def main():
             with col1:
                 st.subheader("📈 Processing Results")
                 if changes:
-                    success_count = len([c for c in changes if c['status'] == 'Success'])
-                    error_count = len(changes) - success_count
+                    success_count = sum(stats['Success'] for stats in sheet_stats.values())
+                    error_count = sum(stats['Error'] for stats in sheet_stats.values())
+                    total_count = success_count + error_count
                     
                     if success_count > 0:
                         st.success(f"✅ Successfully processed {success_count} @IMAGE functions!")
@@ -249,7 +546,7 @@ def main():
                         st.warning(f"⚠️ {error_count} items had errors (see details below)")
                     
                     # Show changes in an expandable section
-                    with st.expander("View all changes", expanded=len(changes) <= 5):
+                    with st.expander("View all changes", expanded=total_count <= 5):
                         for i, change in enumerate(changes, 1):
                             status_icon = "✅" if change['status'] == 'Success' else "❌"
                             st.write(f"**{status_icon} Change {i}:**")
@@ -259,6 +556,8 @@ def main():
                             st.write(f"- URL: `{change['url']}`")
                             st.write(f"- Status: {change['status']}")
                             st.write("---")
+                        if total_count > len(changes):
+                            st.write(f"*+{total_count - len(changes)} more changes not shown*")
                 else:
                     st.info("ℹ️ No @IMAGE functions found in the file.")
             
@@ -288,16 +587,6 @@ def main():
             if changes:
                 st.subheader("📊 Summary")
                 
-                # Count changes per sheet and status
-                sheet_stats = {}
-                for change in changes:
-                    sheet = change['sheet']
-                    status = 'Success' if change['status'] == 'Success' else 'Error'
-                    
-                    if sheet not in sheet_stats:
-                        sheet_stats[sheet] = {'Success': 0, 'Error': 0}
-                    sheet_stats[sheet][status] += 1
-                
                 # Display summary
                 summary_data = []
                 for sheet, stats in sheet_stats.items():